@@ -1,14 +1,37 @@
 import json
 import logging
-import urllib.request
-import urllib.parse
-import urllib.error
+import os
 import ssl
 from typing import Dict, Any, Optional
 
+import urllib3
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# The incoming event is logged as compact JSON; set LAMBDAH_LOG_PRETTY=1 to indent it
+LOG_INDENT = 2 if os.environ.get('LAMBDAH_LOG_PRETTY') == '1' else None
+
+# SSL context that doesn't verify certificates (for testing)
+# In production, you might want to verify certificates
+ssl_context = ssl.create_default_context()
+ssl_context.check_hostname = False
+ssl_context.verify_mode = ssl.CERT_NONE
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# Shared across invocations so warm containers reuse keep-alive connections
+# instead of paying a TCP + TLS handshake on every call. Each request is a
+# single attempt, like urlopen, but redirects are still followed.
+http_pool = urllib3.PoolManager(
+    num_pools=4,
+    maxsize=16,
+    ssl_context=ssl_context,
+    retries=urllib3.Retry(total=None, connect=0, read=0, other=0, redirect=10),
+)
+
+# Default headers sent with every request
+BASE_HEADERS = {'User-Agent': 'lambda-at-home-api-caller'}
+
 def handler(event, context):
     """
     Lambda function that makes HTTP API calls
@@ -19,10 +42,11 @@ def handler(event, context):
         "method": "GET",  # optional, defaults to GET
         "headers": {"User-Agent": "lambda-at-home"},  # optional
         "data": "request body",  # optional, for POST/PUT requests
-        "timeout": 5  # optional, defaults to 5 seconds
+        "timeout": 5,  # optional, defaults to 5 seconds
+        "include_headers": true  # optional, return response headers
     }
     """
-    logger.info("API caller event: %s", json.dumps(event, indent=2))
+    logger.info("API caller event: %s", json.dumps(event, indent=LOG_INDENT))
     
     try:
         # Parse the event
@@ -31,6 +55,7 @@ def handler(event, context):
         headers = event.get('headers', {})
         data = event.get('data')
         timeout = event.get('timeout', 5)
+        include_headers = event.get('include_headers', False)
         
         # If no URL provided, use a default test endpoint
         target_url = url or 'https://httpbin.org/get'
@@ -38,7 +63,7 @@ def handler(event, context):
         logger.info("Making %s request to: %s", method, target_url)
         
         # Make the API call
-        response = make_http_request(target_url, method, headers, data, timeout)
+        response = make_http_request(target_url, method, headers, data, timeout, include_headers)
         
         return {
             'statusCode': 200,
@@ -67,15 +92,14 @@ def handler(event, context):
         }
 
 def make_http_request(url: str, method: str, headers: Dict[str, str], 
-                     data: Optional[str], timeout: int) -> Dict[str, Any]:
+                     data: Optional[str], timeout: int,
+                     include_headers: bool = False) -> Dict[str, Any]:
     """
     Make an HTTP request and return the response
     """
-    # Prepare headers
-    request_headers = {
-        'User-Agent': 'lambda-at-home-api-caller',
-        **headers
-    }
+    # Prepare headers; the shared defaults are only copied when there is
+    # something to merge into them, and are never mutated in place
+    request_headers = {**BASE_HEADERS, **headers} if headers else BASE_HEADERS
     
     # Prepare request data
     request_data = None
@@ -84,49 +108,40 @@ def make_http_request(url: str, method: str, headers: Dict[str, str],
             request_data = data.encode('utf-8')
         else:
             request_data = json.dumps(data).encode('utf-8')
-            request_headers['Content-Type'] = 'application/json'
-    
-    # Create request
-    req = urllib.request.Request(url, data=request_data, headers=request_headers, method=method)
-    
-    # Create SSL context that doesn't verify certificates (for testing)
-    # In production, you might want to verify certificates
-    ssl_context = ssl.create_default_context()
-    ssl_context.check_hostname = False
-    ssl_context.verify_mode = ssl.CERT_NONE
+            request_headers = {**request_headers, 'Content-Type': 'application/json'}
     
     try:
-        with urllib.request.urlopen(req, timeout=timeout, context=ssl_context) as response:
-            response_data = response.read().decode('utf-8')
-            
-            # Try to parse as JSON, fallback to string
-            try:
-                parsed_data = json.loads(response_data)
-            except json.JSONDecodeError:
-                parsed_data = response_data
-            
-            return {
-                'statusCode': response.status,
-                'headers': dict(response.headers),
-                'data': parsed_data
-            }
-            
-    except urllib.error.HTTPError as e:
-        # Handle HTTP errors (4xx, 5xx)
-        error_data = e.read().decode('utf-8') if e.fp else ''
-        try:
-            parsed_error = json.loads(error_data)
-        except json.JSONDecodeError:
-            parsed_error = error_data
-            
-        return {
-            'statusCode': e.code,
-            'headers': dict(e.headers) if hasattr(e, 'headers') else {},
-            'data': parsed_error,
-            'error': True
-        }
-        
-    except urllib.error.URLError as e:
-        raise Exception(f"URL error: {e.reason}")
+        response = http_pool.request(
+            method,
+            url,
+            body=request_data,
+            headers=request_headers,
+            timeout=timeout,
+        )
+    except urllib3.exceptions.HTTPError as e:
+        raise Exception(f"URL error: {e}")
     except Exception as e:
         raise Exception(f"Request failed: {str(e)}")
+
+    response_data = response.data.decode('utf-8')
+
+    # Try to parse as JSON, fallback to string
+    try:
+        parsed_data = json.loads(response_data)
+    except json.JSONDecodeError:
+        parsed_data = response_data
+
+    result = {
+        'statusCode': response.status,
+        'data': parsed_data
+    }
+
+    # Copying the full header map is only worth it when the caller asks for it
+    if include_headers:
+        result['headers'] = dict(response.headers)
+
+    # Handle HTTP errors (4xx, 5xx)
+    if response.status >= 400:
+        result['error'] = True
+
+    return result
@@ -1,21 +1,37 @@
 import json
+import os
 import time
-from datetime import datetime
+
+# Event and context are printed compactly unless LAMBDAH_LOG_PRETTY=1
+LOG_INDENT = 2 if os.environ.get('LAMBDAH_LOG_PRETTY') == '1' else None
+
+# strftime output for the current second; only the fractional part changes
+# between calls within the same second
+_ts_cache = [None, '']
+
+def iso_now():
+    """Current UTC time as ISO-8601 with microseconds"""
+    now_ns = time.time_ns()
+    sec = now_ns // 1_000_000_000
+    if _ts_cache[0] != sec:
+        _ts_cache[0] = sec
+        _ts_cache[1] = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(sec))
+    return f'{_ts_cache[1]}.{(now_ns // 1000) % 1_000_000:06d}Z'
 
 def handler(event, context):
     print('WebSocket runtime test function invoked')
-    print('Event:', json.dumps(event, indent=2))
+    print('Event:', json.dumps(event, indent=LOG_INDENT))
     print('Context:', json.dumps({
         'function_name': context.get('function_name'),
         'aws_request_id': context.get('aws_request_id'),
         'memory_limit_in_mb': context.get('memory_limit_in_mb')
-    }, indent=2))
+    }, indent=LOG_INDENT))
     
     return {
         'statusCode': 200,
         'body': json.dumps({
             'message': 'Hello from WebSocket runtime!',
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': iso_now(),
             'event': event,
             'runtime': 'python311'
         })
@@ -8,6 +8,11 @@ FROM python:3.11-alpine
 # Install runtime interface client and WebSocket dependencies
 RUN apk add --no-cache curl
 RUN pip install --no-cache-dir websockets>=11.0.0
+RUN pip install --no-cache-dir orjson urllib3
+# Optional: large-payload parser, the runtime falls back to orjson without it
+RUN pip install --no-cache-dir pysimdjson || echo "pysimdjson unavailable, skipping"
+# Optional: faster event loop for the WebSocket runtime, falls back to asyncio
+RUN pip install --no-cache-dir uvloop || echo "uvloop unavailable, skipping"
 
 # Create runtime directory
 RUN mkdir -p /var/runtime /var/task
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import importlib
 import json
 import os
 import sys
@@ -10,6 +11,58 @@ import websockets
 import signal
 from typing import Optional, Dict, Any
 
+# Prefer orjson for the per-invocation JSON codec, fall back to the stdlib.
+# The runtime API only accepts text frames, so dumps always returns str.
+# orjson is stricter than json: results it cannot encode (e.g. integers wider
+# than 64 bits) and documents it rejects (NaN/Infinity) go through the stdlib.
+# On decode, integers outside [-2**63, 2**64) become floats; that is accepted
+# rather than scanning every payload for them.
+try:
+    import orjson
+
+    def json_dumps(obj):
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except TypeError:
+            return json.dumps(obj)
+
+    def json_loads(data):
+        try:
+            return orjson.loads(data)
+        except ValueError:
+            return json.loads(data)
+except ImportError:
+    json_dumps = json.dumps
+    json_loads = json.loads
+
+# simdjson only pays off on large frames; the FFI overhead loses on small ones
+SIMDJSON_MIN_BYTES = 4096
+try:
+    import simdjson
+    simdjson_parser = simdjson.Parser()
+except ImportError:
+    simdjson_parser = None
+
+def parse_message(data):
+    """Decode a WebSocket frame, using simdjson for large frames"""
+    if simdjson_parser is not None and len(data) >= SIMDJSON_MIN_BYTES:
+        try:
+            # recursive=True materializes plain Python objects, so no parser-owned
+            # proxy outlives this call and the parser can be reused safely
+            return simdjson_parser.parse(data, recursive=True)
+        except (ValueError, RuntimeError):
+            # simdjson raises RuntimeError (BIGINT_ERROR) for integers wider
+            # than 64 bits and ValueError for NaN/Infinity; the stdlib accepts
+            # both and keeps big integers exact
+            return json.loads(data)
+    return json_loads(data)
+
+# uvloop's libuv-backed event loop cuts per-callback overhead; optional
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 RUNTIME_API = os.environ.get('AWS_LAMBDA_RUNTIME_API', 'localhost:8001')
 FUNCTION_NAME = os.environ.get('AWS_LAMBDA_FUNCTION_NAME')
 FUNCTION_VERSION = os.environ.get('AWS_LAMBDA_FUNCTION_VERSION', '1')
@@ -17,17 +70,58 @@ MEMORY_SIZE = os.environ.get('AWS_LAMBDA_FUNCTION_MEMORY_SIZE')
 LOG_GROUP_NAME = os.environ.get('AWS_LAMBDA_LOG_GROUP_NAME')
 LOG_STREAM_NAME = os.environ.get('AWS_LAMBDA_LOG_STREAM_NAME')
 INSTANCE_ID = os.environ.get('LAMBDAH_INSTANCE_ID')
+# The invoker does not export the function's configured handler; this is only
+# set when the function's environment variables define it explicitly
+HANDLER = os.environ.get('AWS_LAMBDA_FUNCTION_HANDLER', 'lambda_function.handler')
+TASK_ROOT = os.environ.get('LAMBDA_TASK_ROOT', '/var/task')
+
+# Context fields that are fixed for the container's lifetime; each
+# invocation copies this and adds its own request-specific fields
+BASE_CONTEXT = {
+    'function_name': FUNCTION_NAME,
+    'function_version': FUNCTION_VERSION,
+    'memory_limit_in_mb': MEMORY_SIZE,
+    'log_group_name': LOG_GROUP_NAME,
+    'log_stream_name': LOG_STREAM_NAME
+}
+# Per-invocation log lines; resolved once so the hot path only tests a bool
+LOG_INVOCATIONS = os.environ.get('LAMBDAH_LOG_INVOCATIONS', 'true').lower() != 'false'
+EMIT_STACK_TRACE = os.environ.get('LAMBDAH_STACKTRACE', '1') != '0'
 
-# Load the user's handler
+def format_stack_trace(error):
+    """Format an exception's traceback as a list, one entry per frame"""
+    if not EMIT_STACK_TRACE:
+        return []
+    return list(traceback.TracebackException.from_exception(error).format())
+
+# Load the user's handler. Splitting on the last dot lets a manually set
+# AWS_LAMBDA_FUNCTION_HANDLER name a nested module such as "pkg.sub.handler",
+# and import_module resolves through sys.path and
+# the module cache rather than building a file path from the cwd.
 try:
-    import lambda_function
-    handler = lambda_function.handler
+    if TASK_ROOT not in sys.path:
+        sys.path.insert(0, TASK_ROOT)
+    module_name, _, function_name = HANDLER.rpartition('.')
+    handler = getattr(importlib.import_module(module_name), function_name, None)
     if not callable(handler):
-        raise Exception('Handler function not found in lambda_function.py')
+        raise Exception(f'Handler function not found: {HANDLER}')
 except Exception as e:
     print(f'Failed to load handler: {e}', file=sys.stderr)
     sys.exit(1)
 
+def warm_up_handler():
+    """Optionally invoke the handler once during init so its lazy imports and
+    client setup happen before the first real invocation instead of during it.
+    Called from the entry point only, so importing this module (e.g. the
+    WebSocket runtime's HTTP fallback) never re-runs it."""
+    if os.environ.get('LAMBDAH_HANDLER_WARMUP') != '1':
+        return
+    try:
+        handler(json.loads(os.environ.get('LAMBDAH_WARMUP_EVENT', '{}')), {**BASE_CONTEXT, 'warmup': True})
+        print('Handler warmup complete')
+    except Exception as e:
+        print(f'Handler warmup failed: {e}', file=sys.stderr)
+
 class WebSocketRuntime:
     def __init__(self):
         self.websocket: Optional[websockets.WebSocketServerProtocol] = None
@@ -70,7 +164,7 @@ class WebSocketRuntime:
         try:
             async for message in self.websocket:
                 try:
-                    data = json.loads(message)
+                    data = parse_message(message)
                     await self.handle_message(data)
                 except json.JSONDecodeError as e:
                     print(f'Failed to parse WebSocket message: {e}', file=sys.stderr)
@@ -106,16 +200,13 @@ class WebSocketRuntime:
         invoked_function_arn = message.get('invoked_function_arn')
         trace_id = message.get('trace_id')
         
-        print(f'Received invocation: {request_id}')
+        if LOG_INVOCATIONS:
+            print(f'Received invocation: {request_id}')
 
         try:
             # Create context object
             context = {
-                'function_name': FUNCTION_NAME,
-                'function_version': FUNCTION_VERSION,
-                'memory_limit_in_mb': MEMORY_SIZE,
-                'log_group_name': LOG_GROUP_NAME,
-                'log_stream_name': LOG_STREAM_NAME,
+                **BASE_CONTEXT,
                 'aws_request_id': request_id,
                 'invoked_function_arn': invoked_function_arn,
                 'trace_id': trace_id
@@ -123,6 +214,11 @@ class WebSocketRuntime:
             
             # Execute the user function
             result = handler(payload, context)
+
+            # Accept pre-serialized JSON results like the HTTP runtime does; the
+            # response envelope is itself JSON, so the value is decoded here
+            if isinstance(result, (bytes, bytearray)) and result[:1] in (b'{', b'['):
+                result = parse_message(bytes(result).decode('utf-8'))
             
             # Send response
             await self.send({
@@ -134,7 +230,8 @@ class WebSocketRuntime:
                 }
             })
             
-            print(f'Response posted for: {request_id}')
+            if LOG_INVOCATIONS:
+                print(f'Response posted for: {request_id}')
             
         except Exception as error:
             print(f'Handler error: {error}', file=sys.stderr)
@@ -145,7 +242,7 @@ class WebSocketRuntime:
                 'request_id': request_id,
                 'error_message': str(error),
                 'error_type': type(error).__name__,
-                'stack_trace': traceback.format_exc().split('\n'),
+                'stack_trace': format_stack_trace(error),
                 'headers': {
                     'X-Amz-Function-Error': 'Unhandled'
                 }
@@ -153,9 +250,12 @@ class WebSocketRuntime:
 
     async def send(self, message: Dict[str, Any]):
         """Send a message via WebSocket"""
+        # Encode outside the try so an unserializable handler result reaches
+        # handle_invocation and is reported as an error instead of dropped
+        frame = json_dumps(message)
         if self.websocket and self.is_connected:
             try:
-                await self.websocket.send(json.dumps(message))
+                await self.websocket.send(frame)
             except Exception as e:
                 print(f'Failed to send WebSocket message: {e}', file=sys.stderr)
         else:
@@ -163,7 +263,12 @@ class WebSocketRuntime:
 
     async def handle_reconnect(self):
         """Handle reconnection logic"""
-        if self.reconnect_attempts < self.max_reconnect_attempts and not self.should_stop:
+        # A close initiated by shutdown() is expected; don't reconnect or
+        # start the HTTP runtime while the container is being recycled
+        if self.should_stop:
+            return
+
+        if self.reconnect_attempts < self.max_reconnect_attempts:
             self.reconnect_attempts += 1
             print(f'Attempting to reconnect ({self.reconnect_attempts}/{self.max_reconnect_attempts}) in {self.reconnect_delay}s')
             
@@ -196,13 +301,16 @@ async def main():
     
     runtime = WebSocketRuntime()
     
-    # Set up signal handlers for graceful shutdown
-    def signal_handler(signum, frame):
+    # Set up signal handlers for graceful shutdown. Registering them on the
+    # loop runs the callback as a normal loop callback instead of from
+    # signal context, where creating tasks is unsafe.
+    def signal_handler(signum):
         print(f'Received signal {signum}, shutting down...')
         asyncio.create_task(runtime.shutdown())
     
-    signal.signal(signal.SIGTERM, signal_handler)
-    signal.signal(signal.SIGINT, signal_handler)
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, signal_handler, signum)
     
     try:
         await runtime.connect()
@@ -214,4 +322,8 @@ async def main():
         await runtime.shutdown()
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    warm_up_handler()
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
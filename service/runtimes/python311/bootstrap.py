@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
 
+import http.client
+import importlib
 import json
 import os
 import sys
-import urllib.request
-import urllib.error
 import time
 import traceback
 
@@ -18,6 +18,53 @@ try:
 except ImportError:
     HAS_WEBSOCKETS = False
 
+# Prefer orjson for the per-invocation JSON codec, fall back to the stdlib.
+# orjson is stricter than json: results it cannot encode (e.g. integers wider
+# than 64 bits) and documents it rejects (NaN/Infinity) go through the stdlib.
+# On decode, integers outside [-2**63, 2**64) become floats; that is accepted
+# rather than scanning every payload for them.
+try:
+    import orjson
+
+    def json_dumps(obj):
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            return json.dumps(obj).encode('utf-8')
+
+    def json_loads(data):
+        try:
+            return orjson.loads(data)
+        except ValueError:
+            return json.loads(data)
+except ImportError:
+    def json_dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+
+    json_loads = json.loads
+
+# simdjson only pays off on large documents; the FFI overhead loses on small ones
+SIMDJSON_MIN_BYTES = 4096
+try:
+    import simdjson
+    simdjson_parser = simdjson.Parser()
+except ImportError:
+    simdjson_parser = None
+
+def parse_payload(data):
+    """Decode an invocation payload, using simdjson for large documents"""
+    if simdjson_parser is not None and len(data) >= SIMDJSON_MIN_BYTES:
+        try:
+            # recursive=True materializes plain Python objects, so no parser-owned
+            # proxy outlives this call and the parser can be reused safely
+            return simdjson_parser.parse(data, recursive=True)
+        except (ValueError, RuntimeError):
+            # simdjson raises RuntimeError (BIGINT_ERROR) for integers wider
+            # than 64 bits and ValueError for NaN/Infinity; the stdlib accepts
+            # both and keeps big integers exact
+            return json.loads(data)
+    return json_loads(data)
+
 RUNTIME_API = os.environ.get('AWS_LAMBDA_RUNTIME_API', 'localhost:9001')
 FUNCTION_NAME = os.environ.get('AWS_LAMBDA_FUNCTION_NAME')
 FUNCTION_VERSION = os.environ.get('AWS_LAMBDA_FUNCTION_VERSION')
@@ -25,76 +72,159 @@ MEMORY_SIZE = os.environ.get('AWS_LAMBDA_FUNCTION_MEMORY_SIZE')
 LOG_GROUP_NAME = os.environ.get('AWS_LAMBDA_LOG_GROUP_NAME')
 LOG_STREAM_NAME = os.environ.get('AWS_LAMBDA_LOG_STREAM_NAME')
 INSTANCE_ID = os.environ.get('LAMBDAH_INSTANCE_ID')
+# The invoker does not export the function's configured handler; this is only
+# set when the function's environment variables define it explicitly
+HANDLER = os.environ.get('AWS_LAMBDA_FUNCTION_HANDLER', 'lambda_function.handler')
+TASK_ROOT = os.environ.get('LAMBDA_TASK_ROOT', '/var/task')
+
+# Context fields that are fixed for the container's lifetime; each
+# invocation copies this and adds its own request-specific fields
+BASE_CONTEXT = {
+    'function_name': FUNCTION_NAME,
+    'function_version': FUNCTION_VERSION,
+    'memory_limit_in_mb': MEMORY_SIZE,
+    'log_group_name': LOG_GROUP_NAME,
+    'log_stream_name': LOG_STREAM_NAME
+}
+# Per-invocation log lines; resolved once so the hot path only tests a bool
+LOG_INVOCATIONS = os.environ.get('LAMBDAH_LOG_INVOCATIONS', 'true').lower() != 'false'
+EMIT_STACK_TRACE = os.environ.get('LAMBDAH_STACKTRACE', '1') != '0'
 
-# Load the user's handler
+def format_stack_trace(error):
+    """Format an exception's traceback as a list, one entry per frame"""
+    if not EMIT_STACK_TRACE:
+        return []
+    return list(traceback.TracebackException.from_exception(error).format())
+
+# Load the user's handler. Splitting on the last dot lets a manually set
+# AWS_LAMBDA_FUNCTION_HANDLER name a nested module such as "pkg.sub.handler",
+# and import_module resolves through sys.path and
+# the module cache rather than building a file path from the cwd.
 try:
-    import lambda_function
-    handler = lambda_function.handler
+    if TASK_ROOT not in sys.path:
+        sys.path.insert(0, TASK_ROOT)
+    module_name, _, function_name = HANDLER.rpartition('.')
+    handler = getattr(importlib.import_module(module_name), function_name, None)
     if not callable(handler):
-        raise Exception('Handler function not found in lambda_function.py')
+        raise Exception(f'Handler function not found: {HANDLER}')
 except Exception as e:
     print(f'Failed to load handler: {e}', file=sys.stderr)
     sys.exit(1)
 
+def warm_up_handler():
+    """Optionally invoke the handler once during init so its lazy imports and
+    client setup happen before the first real invocation instead of during it.
+    Called from the entry point only, so importing this module (e.g. the
+    WebSocket runtime's HTTP fallback) never re-runs it."""
+    if os.environ.get('LAMBDAH_HANDLER_WARMUP') != '1':
+        return
+    try:
+        handler(json.loads(os.environ.get('LAMBDAH_WARMUP_EVENT', '{}')), {**BASE_CONTEXT, 'warmup': True})
+        print('Handler warmup complete')
+    except Exception as e:
+        print(f'Handler warmup failed: {e}', file=sys.stderr)
+
+# Keep the runtime API connection alive across invocations. urllib3 is
+# preferred; without it a single persistent http.client connection is reused
+try:
+    import urllib3
+    # One connect retry, matching the http.client fallback's single reconnect
+    # when a kept-alive socket has gone stale
+    runtime_pool = urllib3.PoolManager(
+        num_pools=1,
+        maxsize=4,
+        retries=urllib3.Retry(total=1, connect=1, read=0, redirect=False),
+    )
+except ImportError:
+    runtime_pool = None
+
+runtime_conn = None
+
+def runtime_conn_request(method, path, body, headers):
+    """Send a request over the persistent connection, reconnecting once if it went stale"""
+    global runtime_conn
+    for attempt in range(2):
+        if runtime_conn is None:
+            runtime_conn = http.client.HTTPConnection(RUNTIME_API)
+        try:
+            runtime_conn.request(method, path, body=body, headers=headers)
+            response = runtime_conn.getresponse()
+            # The body must be drained before the connection can be reused
+            return response, response.read()
+        except (ConnectionError, http.client.HTTPException):
+            runtime_conn.close()
+            runtime_conn = None
+            if attempt:
+                raise
+
+def runtime_request(method, path, body=None):
+    """Send a request to the runtime API and return (headers, body)"""
+    headers = {'User-Agent': 'lambda-runtime-interface-client'}
+    if INSTANCE_ID:
+        headers['X-LambdaH-Instance-Id'] = INSTANCE_ID
+    if body is not None:
+        headers['Content-Type'] = 'application/json'
+
+    if runtime_pool is not None:
+        url = f'http://{RUNTIME_API}{path}'
+        response = runtime_pool.request(method, url, body=body, headers=headers)
+        if response.status >= 400:
+            raise Exception(f'HTTP Error {response.status}: {response.reason}')
+        return response.headers, response.data
+
+    response, data = runtime_conn_request(method, path, body, headers)
+    if response.status >= 400:
+        raise Exception(f'HTTP Error {response.status}: {response.reason}')
+    return response.headers, data
+
 def get_next_invocation():
     """Get the next invocation from the runtime API"""
-    url = f'http://{RUNTIME_API}/2018-06-01/runtime/invocation/next?fn={FUNCTION_NAME}'
+    path = f'/2018-06-01/runtime/invocation/next?fn={FUNCTION_NAME}'
     
     try:
-        req = urllib.request.Request(url)
-        if INSTANCE_ID:
-            req.add_header('X-LambdaH-Instance-Id', INSTANCE_ID)
-        req.add_header('User-Agent', 'lambda-runtime-interface-client')
+        # Both urllib3 and http.client header maps support case-insensitive get()
+        headers, data = runtime_request('GET', path)
         
-        with urllib.request.urlopen(req) as response:
-            data = response.read().decode('utf-8')
-            headers = dict(response.headers)
-            
-            return {
-                'requestId': headers.get('lambda-runtime-aws-request-id'),
-                'deadline': headers.get('lambda-runtime-deadline-ms'),
-                'invokedFunctionArn': headers.get('lambda-runtime-invoked-function-arn'),
-                'traceId': headers.get('lambda-runtime-trace-id'),
-                'payload': json.loads(data)
-            }
+        return {
+            'requestId': headers.get('lambda-runtime-aws-request-id'),
+            'deadline': headers.get('lambda-runtime-deadline-ms'),
+            'invokedFunctionArn': headers.get('lambda-runtime-invoked-function-arn'),
+            'traceId': headers.get('lambda-runtime-trace-id'),
+            'payload': parse_payload(data)
+        }
     except Exception as e:
         raise Exception(f'Failed to get next invocation: {e}')
 
 def post_response(request_id, response):
     """Post the response back to the runtime API"""
-    url = f'http://{RUNTIME_API}/2018-06-01/runtime/invocation/{request_id}/response'
+    path = f'/2018-06-01/runtime/invocation/{request_id}/response'
     
     try:
-        data = json.dumps(response).encode('utf-8')
-        req = urllib.request.Request(url, data=data)
-        if INSTANCE_ID:
-            req.add_header('X-LambdaH-Instance-Id', INSTANCE_ID)
-        req.add_header('Content-Type', 'application/json')
-        
-        with urllib.request.urlopen(req) as response:
-            pass  # Response posted successfully
+        # Handlers that already produce serialized JSON can return it as bytes
+        # and skip a second encoding pass. The bytes are still decoded once so
+        # invalid JSON is reported as an error, as on the WebSocket runtime,
+        # rather than reaching the caller as null.
+        if isinstance(response, (bytes, bytearray)) and response[:1] in (b'{', b'['):
+            json_loads(response)
+            body = response
+        else:
+            body = json_dumps(response)
+        runtime_request('POST', path, body)
     except Exception as e:
         raise Exception(f'Failed to post response: {e}')
 
 def post_error(request_id, error):
     """Post an error back to the runtime API"""
-    url = f'http://{RUNTIME_API}/2018-06-01/runtime/invocation/{request_id}/error'
+    path = f'/2018-06-01/runtime/invocation/{request_id}/error'
     
     try:
         error_data = {
             'errorType': type(error).__name__,
             'errorMessage': str(error),
-            'stackTrace': traceback.format_exc().split('\n')
+            'stackTrace': format_stack_trace(error)
         }
         
-        data = json.dumps(error_data).encode('utf-8')
-        req = urllib.request.Request(url, data=data)
-        if INSTANCE_ID:
-            req.add_header('X-LambdaH-Instance-Id', INSTANCE_ID)
-        req.add_header('Content-Type', 'application/json')
-        
-        with urllib.request.urlopen(req) as response:
-            pass  # Error posted successfully
+        runtime_request('POST', path, json_dumps(error_data))
     except Exception as e:
         print(f'Failed to post error: {e}', file=sys.stderr)
 
@@ -104,15 +234,12 @@ def main():
     while True:
         try:
             invocation = get_next_invocation()
-            print(f'Received invocation: {invocation["requestId"]}')
+            if LOG_INVOCATIONS:
+                print(f'Received invocation: {invocation["requestId"]}')
             
             try:
                 context = {
-                    'function_name': FUNCTION_NAME,
-                    'function_version': FUNCTION_VERSION,
-                    'memory_limit_in_mb': MEMORY_SIZE,
-                    'log_group_name': LOG_GROUP_NAME,
-                    'log_stream_name': LOG_STREAM_NAME,
+                    **BASE_CONTEXT,
                     'aws_request_id': invocation['requestId'],
                     'invoked_function_arn': invocation['invokedFunctionArn'],
                     'trace_id': invocation['traceId']
@@ -120,7 +247,8 @@ def main():
                 
                 result = handler(invocation['payload'], context)
                 post_response(invocation['requestId'], result)
-                print(f'Response posted for: {invocation["requestId"]}')
+                if LOG_INVOCATIONS:
+                    print(f'Response posted for: {invocation["requestId"]}')
                 
             except Exception as error:
                 print(f'Handler error: {error}', file=sys.stderr)
@@ -132,6 +260,7 @@ def main():
             time.sleep(1)
 
 if __name__ == '__main__':
+    warm_up_handler()
     if USE_WEBSOCKET and HAS_WEBSOCKETS:
         print('Starting WebSocket runtime...')
         try: